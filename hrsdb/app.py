@@ -11,45 +11,148 @@ Returns:
 
   Encapsulating the response inside a Json object ensures that the top level object cannot be a list.
 """
-import csv
+import hashlib
 import logging
 import os
-import werkzeug
+import threading
 
-from flask import Flask, jsonify, abort, current_app
-from flask_restful import Api, Resource, reqparse
-from sqlalchemy.orm.exc import NoResultFound
-from uuid import uuid4 as uuid
+import orjson
+
+from datetime import datetime
+from typing import List, Optional
+
+from cachetools import TTLCache
+from flask import Flask, abort, current_app, request, send_file
+from flask.json.provider import DefaultJSONProvider
+from flask_restful import Api, Resource
+from pydantic import BaseModel, ValidationError, field_validator
+from sqlalchemy import bindparam, insert, lambda_stmt, select
+from sqlalchemy.exc import IntegrityError
+from secrets import token_hex
 
 # Local imports
-from hrsdb import utils
-from hrsdb.db import open_session, to_dict
+from hrsdb import db, utils
+from hrsdb.db import open_readonly_session, open_session, to_dict
 from hrsdb.db.models import Biometric, BiometricType, ECG, ECGData, Patient
 
 # Logging
 logger = logging.getLogger(__name__)
 
+class ORJSONProvider(DefaultJSONProvider):
+    """JSON provider backed by orjson.
+
+    Installed on the app so every jsonify call encodes in C and handles
+    datetime natively, without per-endpoint changes.
+    """
+
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+
 # Webapp
 webapp = Flask(__name__)
+webapp.json = ORJSONProvider(webapp)
+
+# Trailing slashes resolve to the same endpoint without a redirect check.
+# Set before the resources are registered so every rule picks it up.
+webapp.url_map.strict_slashes = False
+
+
+@webapp.teardown_appcontext
+def _remove_sessions(exception=None):
+    """Return the request's scoped database sessions to their registries"""
+    if db.Session is not None:
+        db.Session.remove()
+    if db.ReadSession is not None:
+        db.ReadSession.remove()
+
+
+# Per-request query budget, enabled together with the engine-side
+# counter by setting HRSDB_QUERY_COUNT to a statement limit
+_QUERY_BUDGET = int(os.environ.get('HRSDB_QUERY_COUNT') or 0)
+
+if _QUERY_BUDGET:
+    @webapp.before_request
+    def _reset_query_count():
+        db.reset_query_count()
+
+    @webapp.after_request
+    def _check_query_count(response):
+        count = db.query_count()
+        if count > _QUERY_BUDGET:
+            logger.warning("%s %s issued %d queries (budget %d)",
+                           request.method, request.path, count, _QUERY_BUDGET)
+        return response
+
+
+def _etag_response(body):
+    """Build a JSON response carrying a content ETag.
+
+    Repeat reads with a matching If-None-Match get an empty 304 instead
+    of the full body. Werkzeug only applies the conditional logic to
+    GET/HEAD requests so write responses pass through unchanged.
+    """
+    resp = webapp.response_class(body, mimetype='application/json')
+    resp.set_etag(hashlib.blake2b(body, digest_size=16).hexdigest())
+    return resp.make_conditional(request)
 
 
 def gen_response(data):
     """Return a JSON encoded response object for flask"""
-    return jsonify({
-                "response": data
-            })
+    return _etag_response(orjson.dumps({"response": data}, default=str))
+
+
+def fast_json(data):
+    """Return an orjson encoded response object for flask.
+
+    Used on list endpoints where JSON encoding cost dominates.
+    orjson serializes datetime objects natively so no per-column
+    conversion is needed.
+    """
+    return _etag_response(orjson.dumps({"response": data}))
+
+
+def _parse_datetime(value):
+    """Accept the common date format from utils alongside ISO-8601"""
+    if isinstance(value, str):
+        parsed = utils.str2date(value)
+        if parsed is not None:
+            return parsed
+    return value
+
+
+class PageArgs(BaseModel):
+    """Validated keyset pagination arguments for list endpoints"""
+    limit: int = 100
+    after_id: int = 0
+
+    @field_validator('limit')
+    @classmethod
+    def _clamp_limit(cls, value):
+        if value < 1:
+            raise ValueError('limit must be positive')
+        return min(value, 1000)
+
+
+class PatientSchema(BaseModel):
+    """Validated request body for PatientAPI.put"""
+    first_name: str
+    last_name: str
+    gender: int
+    date_of_birth: datetime
+
+    @field_validator('date_of_birth', mode='before')
+    @classmethod
+    def _convert_date(cls, value):
+        return _parse_datetime(value)
 
 
 class PatientAPI(Resource):
     """API handler for accessing patient records: **/patient/<id:int>**"""
 
-    # Parser for PUT requests
-    parser = reqparse.RequestParser()
-    parser.add_argument('first_name', required=True)
-    parser.add_argument('last_name', required=True)
-    parser.add_argument('gender', type=int, required=True)
-    parser.add_argument('date_of_birth', required=True)
-
     def get(self, patient_id):
         """Get a patient record by ID from the database
 
@@ -66,20 +169,19 @@ class PatientAPI(Resource):
             }
         
         """
-        with open_session() as session:
+        with open_readonly_session() as session:
             try:
-                record = session.query(Patient) \
-                    .filter(Patient.id == patient_id).one()
-            except NoResultFound:
+                record = session.get(Patient, patient_id)
+            except Exception as error:
+                logger.exception("Exception: %s", error)
+                return gen_response("Internal server error")
+
+            if record is None:
                 logger.info("No record found")
                 resp = gen_response("No record found")
                 resp.status_code = 404
                 return resp
 
-            except Exception as error:
-                print("Exeption: %s" % (str(error)))
-                return gen_response("Internal server error")
-
             return gen_response(to_dict(record))
 
     def put(self, patient_id):
@@ -102,25 +204,27 @@ class PatientAPI(Resource):
             }
 
         """
-        args = self.parser.parse_args()
-
-        # Convert data_time and validate
-        date_of_birth = utils.str2date(args.date_of_birth)
-        if date_of_birth is None:
-            abort()
+        try:
+            args = PatientSchema.model_validate_json(request.get_data(cache=False))
+        except ValidationError:
+            abort(400)
 
         return_id = None
         with open_session() as session:
-            record = Patient(args.first_name,
-                             args.last_name,
-                             args.gender,
-                             date_of_birth)
-
-            session.add(record)
-            session.flush()
-            session.commit()
-
-            return_id = record.id
+            # A Core insert with RETURNING skips the ORM unit-of-work
+            # bookkeeping and gets the new id back in the same statement.
+            return_id = session.execute(
+                insert(Patient)
+                .values(first_name=args.first_name,
+                        last_name=args.last_name,
+                        gender=args.gender,
+                        date_of_birth=args.date_of_birth)
+                .returning(Patient.id)
+            ).scalar_one()
+
+        # New record invalidates the cached listing
+        with _patients_cache_lock:
+            _patients_cache.clear()
 
         # Check for error handling
         if return_id is None:
@@ -128,9 +232,14 @@ class PatientAPI(Resource):
         else:
             return gen_response({"id": return_id})
 
-    @staticmethod
-    def add(api):
-        api.add_resource(PatientAPI, '/patient/<int:patient_id>')
+
+
+# Pre-encoded /patients response pages keyed on (limit, after_id), kept
+# for a few seconds to absorb repeated polling. Cleared when a patient
+# is added. TTLCache is not thread-safe and the server runs threaded,
+# so every access goes through the lock.
+_patients_cache = TTLCache(maxsize=32, ttl=5)
+_patients_cache_lock = threading.Lock()
 
 
 class PatientListAPI(Resource):
@@ -160,24 +269,85 @@ class PatientListAPI(Resource):
               ]
             }
 
+        Pages through records by id: ``limit`` rows per page (default
+        100, max 1000), resuming after ``after_id``. ``next_cursor`` in
+        the response is null on the final page.
         """
-        with open_session() as session:
+        try:
+            args = PageArgs.model_validate(request.args.to_dict())
+        except ValidationError:
+            abort(400)
+
+        cache_key = (args.limit, args.after_id)
+        with _patients_cache_lock:
+            try:
+                body = _patients_cache[cache_key]
+            except KeyError:
+                body = None
+
+        if body is not None:
+            return _etag_response(body)
+
+        with open_readonly_session() as session:
             try:
-                records = session.query(Patient).all()
-            except NoResultFound:
-                logger.info("No record found")    # TODO: remove debugging
-                return gen_response("No result found")
+                rows = session.execute(
+                    select(Patient.id, Patient.first_name, Patient.last_name,
+                           Patient.gender, Patient.date_of_birth)
+                    .where(Patient.id > args.after_id)
+                    .order_by(Patient.id)
+                    .limit(args.limit)
+                ).mappings().all()
             except Exception as error:
-                logger.exception("Exeption: %s" % (str(error)))
+                logger.exception("Exception: %s", error)
                 return gen_response("Internal server error")
 
-            # Build the response list
-            rlist = [to_dict(record) for record in records]
-            return gen_response(rlist)
+            # Encode the response page once and cache the raw body
+            next_cursor = rows[-1]['id'] if len(rows) == args.limit else None
+            body = orjson.dumps({
+                "response": [dict(row) for row in rows],
+                "next_cursor": next_cursor
+            })
+            with _patients_cache_lock:
+                _patients_cache[cache_key] = body
+            return _etag_response(body)
+
+    def post(self):
+        """Insert a batch of patient records
+
+        Example **POST http://hrsdb/patients** with a JSON array of
+        patient objects in the request body. Rows are inserted in
+        chunks of 10000 so one commit and WAL sync covers each chunk
+        instead of one per record.
 
-    @staticmethod
-    def add(api):
-        api.add_resource(PatientListAPI, '/patients')
+        Returns the number of records inserted.
+        """
+        try:
+            body = orjson.loads(request.get_data(cache=False))
+        except orjson.JSONDecodeError:
+            abort(400)
+
+        if not isinstance(body, list):
+            abort(400)
+
+        try:
+            rows = [PatientSchema.model_validate(entry).model_dump()
+                    for entry in body]
+        except ValidationError:
+            abort(400)
+
+        with open_session() as session:
+            for start in range(0, len(rows), 10000):
+                session.execute(insert(Patient), rows[start:start + 10000])
+
+        with _patients_cache_lock:
+            _patients_cache.clear()
+        return gen_response({"count": len(rows)})
+
+
+
+# Pre-encoded /biometric_types body. The table is static data created at
+# init_db so the bytes are built once on first request and kept.
+_biometric_types_cache = None
 
 
 class BiometricTypeAPI(Resource):
@@ -205,30 +375,54 @@ class BiometricTypeAPI(Resource):
             }
 
         """
-        records = None
-        with open_session() as session:
+        global _biometric_types_cache
+        if _biometric_types_cache is not None:
+            return _etag_response(_biometric_types_cache)
+
+        with open_readonly_session() as session:
             try:
-                records = session.query(BiometricType).all()
+                rows = session.execute(
+                    select(BiometricType.id, BiometricType.name,
+                           BiometricType.units)
+                ).mappings().all()
             except Exception as error:
-                logger.exception("Exeption: %s" % (str(error)))
+                logger.exception("Exception: %s", error)
                 return gen_response("Internal server error")
 
-            logger.debug(records)
-            rlist = [to_dict(record) for record in records]
-            return gen_response(rlist)
+            body = orjson.dumps({"response": [dict(row) for row in rows]})
+            _biometric_types_cache = body
+            return _etag_response(body)
+
+
+
+class BiometricSchema(BaseModel):
+    """Validated request body for BiometricAPI.put"""
+    patient_id: int
+    biometric_type_id: int
+    value: str
+    timestamp: datetime
+
+    @field_validator('timestamp', mode='before')
+    @classmethod
+    def _convert_date(cls, value):
+        return _parse_datetime(value)
 
-    @staticmethod
-    def add(api):
-        api.add_resource(BiometricTypeAPI, '/biometric_types')
+
+class BiometricBulkSchema(BaseModel):
+    """Validated request body for bulk BiometricAPI.put uploads"""
+    patient_id: int
+    biometric_type_id: int
+    value: List[str]
+    timestamp: datetime
+
+    @field_validator('timestamp', mode='before')
+    @classmethod
+    def _convert_date(cls, value):
+        return _parse_datetime(value)
 
 
 class BiometricAPI(Resource):
     """API handler for accessing biometric records: **/biometric/<id:int>**"""
-    parser = reqparse.RequestParser()
-    parser.add_argument('patient_id', required=True)
-    parser.add_argument('biometric_type_id', required=True)
-    parser.add_argument('value', required=True)
-    parser.add_argument('timestamp', required=True)
 
     def get(self, biometric_id):
         """Get a biometric record by ID from the database
@@ -247,18 +441,18 @@ class BiometricAPI(Resource):
 
         """
         record = None
-        with open_session() as session:
+        with open_readonly_session() as session:
             try:
-                record = session.query(Biometric) \
-                    .filter(Biometric.id == biometric_id).one()
-            except NoResultFound:
+                record = session.get(Biometric, biometric_id)
+            except Exception as error:
+                logger.exception("Exception: %s", error)
+                return gen_response("Internal server error")
+
+            if record is None:
                 logger.warn("No record found")
                 resp = gen_response("No record found")
                 resp.status_code = 404
                 return resp
-            except Exception as error:
-                logger.exception("Exeption: %s" % (str(error)))
-                return gen_response("Internal server error")
 
             logger.debug(record)
             return gen_response(to_dict(record))
@@ -283,55 +477,106 @@ class BiometricAPI(Resource):
             }
 
         """
-        args = self.parser.parse_args()
+        try:
+            body = orjson.loads(request.get_data(cache=False))
+        except orjson.JSONDecodeError:
+            abort(400)
+
+        # Bulk monitors send "value" as a list of readings; insert those
+        # as one batched statement instead of a round-trip per value.
+        if isinstance(body, dict) and isinstance(body.get('value'), list):
+            try:
+                args = BiometricBulkSchema.model_validate(body)
+            except ValidationError:
+                abort(400)
+            return self._put_bulk(args)
 
-        # Convert data_time and validate
-        timestamp = utils.str2date(args.timestamp)
-        if timestamp is None:
-            abort(500)
+        try:
+            args = BiometricSchema.model_validate(body)
+        except ValidationError:
+            abort(400)
 
-        return_id = None
         with open_session() as session:
+            # Insert directly and let the foreign keys reject bad ids,
+            # saving the patient SELECT round-trip per write.
+            biometric = Biometric(args.patient_id,
+                                  args.biometric_type_id,
+                                  args.value,
+                                  args.timestamp)
+            session.add(biometric)
+
             try:
-                patient = session.query(Patient) \
-                            .filter(Patient.id == args.patient_id).one()
-            except NoResultFound:
-                logger.warn("PUT: No Patient matching id for biometric")
-                return gen_response("No matching Patient")
+                session.flush()
+            except IntegrityError:
+                session.rollback()
+                logger.warn("PUT: No matching patient or type for biometric")
+                resp = gen_response("No matching Patient or BiometricType")
+                resp.status_code = 400
+                return resp
+
+            return gen_response({"id": biometric.id})
+
+    def _put_bulk(self, args):
+        """Insert a batch of readings for a single patient and type"""
+        with open_session() as session:
+            try:
+                patient = session.get(Patient, args.patient_id)
             except Exception as error:
-                logger.exception("Exception: %s" % (str(error)))
+                logger.exception("Exception: %s", error)
                 return gen_response("Internal server error")
 
-            # Add biometric record
-            biometric = patient.add_biometric(session,
-                                  args.biometric_type_id,
-                                  args.value,
-                                  timestamp
-                        )
-
-            if biometric is None:
+            if patient is None:
                 logger.warn("PUT: No Patient matching id for biometric")
-                return gen_response("No matching Biometric type")
+                resp = gen_response("No matching Patient")
+                resp.status_code = 400
+                return resp
 
-            session.commit()
-            return gen_response({"id": biometric.id})
+            mappings = [
+                {
+                    'patient_id': args.patient_id,
+                    'type_id': args.biometric_type_id,
+                    'value': value,
+                    'timestamp': args.timestamp
+                }
+                for value in args.value
+            ]
+            try:
+                Biometric.bulk_insert(session, mappings)
+            except IntegrityError:
+                session.rollback()
+                logger.warn("PUT: No matching type for bulk biometric")
+                resp = gen_response("No matching BiometricType")
+                resp.status_code = 400
+                return resp
 
-    @staticmethod
-    def add(api):
-        api.add_resource(BiometricAPI, '/biometric/<int:biometric_id>')
+            return gen_response({"count": len(mappings)})
+
+
+
+class BiometricListArgs(PageArgs):
+    """Validated query arguments for BiometricListAPI.get"""
+    patient_id: int
+    biometric_type_id: Optional[int] = None
+    include: Optional[str] = None
+
+    @field_validator('include')
+    @classmethod
+    def _check_include(cls, value):
+        if value not in (None, 'type'):
+            raise ValueError('unknown include: %s' % value)
+        return value
 
 
 class BiometricListAPI(Resource):
     """API handler for returning lists of biometric records for a specific patient: **/biometrics**
     """
-    parser = reqparse.RequestParser()
-    parser.add_argument('patient_id', required=True)
-    parser.add_argument('biometric_type_id', required=False)
 
     def get(self):
         """
         Fetchs the list of biometric records from the database for this patient
         The list can optionally be filtered using a biometric_type id.
+        Passing ``include=type`` embeds the type name and units in each
+        record via a single join.
 
         Example **GET http://hrsdb/biometrics?patient_id=1&biometric_type_id=1**
         
@@ -354,47 +599,95 @@ class BiometricListAPI(Resource):
             }
 
         """
-        args = self.parser.parse_args(strict=True)
+        try:
+            args = BiometricListArgs.model_validate(request.args.to_dict())
+        except ValidationError:
+            abort(400)
+
+        # lambda_stmt caches the compiled SQL on the lambda identity, so
+        # each statement shape is only compiled once per process.
+        if args.include == 'type':
+            # Embed the type name and units with a single join so
+            # clients do not follow up with per-type lookups.
+            query = lambda_stmt(
+                lambda: select(Biometric.id, Biometric.patient_id,
+                               Biometric.type_id, Biometric.value,
+                               Biometric.timestamp,
+                               BiometricType.name.label('type_name'),
+                               BiometricType.units.label('type_units'))
+                .join(BiometricType, Biometric.type_id == BiometricType.id)
+                .where(Biometric.patient_id == bindparam('patient_id'))
+                .where(Biometric.id > bindparam('after_id'))
+                .order_by(Biometric.id)
+                .limit(bindparam('limit'))
+            )
+        else:
+            query = lambda_stmt(
+                lambda: select(Biometric.id, Biometric.patient_id,
+                               Biometric.type_id, Biometric.value,
+                               Biometric.timestamp)
+                .where(Biometric.patient_id == bindparam('patient_id'))
+                .where(Biometric.id > bindparam('after_id'))
+                .order_by(Biometric.id)
+                .limit(bindparam('limit'))
+            )
+        params = {
+            'patient_id': args.patient_id,
+            'after_id': args.after_id,
+            'limit': args.limit
+        }
 
-        with open_session() as session:
-            try:
-                query = session.query(Biometric) \
-                    .filter(Biometric.patient_id == args.patient_id)
-                    
-                # Optional filter by type_id
-                if(args.biometric_type_id):
-                    query = query.filter(Biometric.type_id == args.biometric_type_id)
-                
-                records = query.all()
-
-            except NoResultFound:
-                logger.info("No record found")
-                resp = gen_response("No result found")
-                resp.status_code = 404
-                return resp
-            except Exception as error:
-                logger.exception("Exeption: %s" % (str(error)))
-                return gen_response("Internal server error")
+        # Optional filter by type_id
+        if args.biometric_type_id is not None:
+            query += lambda stmt: stmt.where(Biometric.type_id == bindparam('type_id'))
+            params['type_id'] = args.biometric_type_id
+
+        def generate():
+            # The session is owned by the generator so it stays open
+            # while the response is being streamed.
+            with open_readonly_session() as session:
+                result = session.execute(
+                    query, params,
+                    execution_options={'stream_results': True, 'yield_per': 500}
+                ).mappings()
+
+                yield b'{"response":['
+                count = 0
+                last_id = None
+                for row in result:
+                    if count:
+                        yield b','
+                    count += 1
+                    last_id = row['id']
+                    yield orjson.dumps(dict(row))
+
+                next_cursor = last_id if count == args.limit else None
+                yield b'],"next_cursor":' + orjson.dumps(next_cursor) + b'}'
 
-            # Build the response list
-            rlist = [to_dict(record) for record in records]
-            return gen_response(rlist)
+        return webapp.response_class(generate(), mimetype='application/json')
 
-    @staticmethod
-    def add(api):
-        api.add_resource(BiometricListAPI, '/biometrics')
+
+
+class ECGListArgs(PageArgs):
+    """Validated query arguments for ECGAPI.get"""
+    patient_id: int
+
+
+class ECGSchema(BaseModel):
+    """Validated request body for ECGAPI.put"""
+    patient_id: int
+    sampling_freq: float
+    data_id: int
+    timestamp: datetime
+
+    @field_validator('timestamp', mode='before')
+    @classmethod
+    def _convert_date(cls, value):
+        return _parse_datetime(value)
 
 
 class ECGAPI(Resource):
     """API handler for returning ECG data for a specific patient: **/ecg**"""
-    get_parser = reqparse.RequestParser()
-    get_parser.add_argument('patient_id', required=True)
-
-    put_parser = reqparse.RequestParser()
-    put_parser.add_argument('patient_id', type=int, required=True)
-    put_parser.add_argument('sampling_freq', type=float, required=True)
-    put_parser.add_argument('data_id', type=int, required=True)
-    put_parser.add_argument('timestamp', required=True)
 
     def get(self):
         """
@@ -420,26 +713,33 @@ class ECGAPI(Resource):
             }
 
         """
-        args = self.get_parser.parse_args(strict=True)
+        try:
+            args = ECGListArgs.model_validate(request.args.to_dict())
+        except ValidationError:
+            abort(400)
 
-        with open_session() as session:
+        limit = args.limit
+
+        with open_readonly_session() as session:
             try:
-                records = session.query(ECG) \
-                    .filter(ECG.patient_id == args.patient_id) \
-                    .all()
-            except NoResultFound:
-                logger.info("No record found")
-                resp = gen_response("No result found")
-                resp.status_code = 404
-                return resp
+                rows = session.execute(
+                    select(ECG.id, ECG.patient_id, ECG.sampling_freq,
+                           ECG.data_id, ECG.timestamp)
+                    .where(ECG.patient_id == args.patient_id)
+                    .where(ECG.id > args.after_id)
+                    .order_by(ECG.id)
+                    .limit(limit)
+                ).mappings().all()
             except Exception as error:
-                logger.exception("Exeption: %s" % (str(error)))
+                logger.exception("Exception: %s", error)
                 return gen_response("Internal server error")
 
-            # Build the response list
-            print(records)
-            rlist = [to_dict(record) for record in records]
-            return gen_response(rlist)
+            # Build the response page
+            next_cursor = rows[-1]['id'] if len(rows) == limit else None
+            return _etag_response(orjson.dumps({
+                "response": [dict(row) for row in rows],
+                "next_cursor": next_cursor
+            }))
 
     def put(self):
         """Put a new ECG record into the database
@@ -462,59 +762,50 @@ class ECGAPI(Resource):
             }
 
         """
-        args = self.put_parser.parse_args()
-
-        # Convert data_time and validate
-        timestamp = utils.str2date(args.timestamp)
-        if timestamp is None:
-            abort(500)
+        try:
+            args = ECGSchema.model_validate_json(request.get_data(cache=False))
+        except ValidationError:
+            abort(400)
 
-        return_id = None
         with open_session() as session:
+            # Insert directly and let the foreign keys reject bad ids,
+            # saving the patient and data SELECT round-trips per write.
+            ecg = ECG(args.patient_id,
+                      args.sampling_freq,
+                      args.data_id,
+                      args.timestamp)
+            session.add(ecg)
+
             try:
-                patient = session.query(Patient) \
-                            .filter(Patient.id == args.patient_id).one()
+                session.flush()
+            except IntegrityError:
+                session.rollback()
+                logger.warn("PUT: No matching patient or data for ECG")
+                resp = gen_response("No matching Patient or ECGData")
+                resp.status_code = 400
+                return resp
 
-                ecgdata = session.query(ECGData) \
-                            .filter(ECGData.id == args.data_id).one()
-            except NoResultFound:
-                logger.warn("PUT: No Patient matching id for biometric")
-                return gen_response("No matching Patient")
-            except Exception as error:
-                logger.exception("Exception: %s" % (str(error)))
-                return gen_response("Internal server error")
+            return gen_response({"id": ecg.id})
 
-            # Add ecg record
-            ecg = patient.add_ecg(
-                session,
-                args.sampling_freq,
-                ecgdata,
-                timestamp
-            )
 
-            session.commit()
-            return gen_response({"id": ecg.id})
 
-    @staticmethod
-    def add(api):
-        api.add_resource(ECGAPI, '/ecg')
+class ECGDataArgs(BaseModel):
+    """Validated query arguments for ECGDataAPI.get"""
+    id: int
+    format: Optional[str] = None
+
+    @field_validator('format')
+    @classmethod
+    def _check_format(cls, value):
+        if value not in (None, 'json', 'raw'):
+            raise ValueError('unknown format: %s' % value)
+        return value
 
 
 class ECGDataAPI(Resource):
     """API handler for returning ECG data for a ECG entry: **/ecgdata**"""
     file_prefix = 'ecg_'
 
-    get_parser = reqparse.RequestParser()
-    get_parser.add_argument('id', required=True)
-
-    put_parser = reqparse.RequestParser()
-    put_parser.add_argument(
-        'data',
-        type=werkzeug.datastructures.FileStorage,
-        location='files',
-        required=True
-    )
-
     def get(self):
         """
         Fetchs the ECG data for a specific entry from disk
@@ -528,27 +819,56 @@ class ECGDataAPI(Resource):
               ]
             }
         """
-        args = self.get_parser.parse_args(strict=True)
+        try:
+            args = ECGDataArgs.model_validate(request.args.to_dict())
+        except ValidationError:
+            abort(400)
 
-        with open_session() as session:
+        with open_readonly_session() as session:
             try:
-                db_record = query = session.query(ECGData) \
-                    .filter(ECGData.id == args.id).one()
-            except NoResultFound:
-                logger.info("No record found")    # TODO: remove debugging
+                db_record = session.get(ECGData, args.id)
+            except Exception as error:
+                logger.exception("Exception: %s", error)
+                return gen_response("Internal server error")
+
+            if db_record is None:
+                logger.info("No record found")
                 resp = gen_response("No result found")
                 resp.status_code = 404
                 return resp
-            except Exception as error:
-                logger.exception("Exeption: %s" % (str(error)))
-                return gen_response("Internal server error")
 
             data_file_path = os.path.join(current_app.config['UPLOAD_FOLDER'], db_record.path)
-            with open(data_file_path) as data_file:
-                csv_reader = csv.reader(data_file)
-                data = list(csv_reader)[0]
 
-            return gen_response(data)
+        # format=raw sends the stored sample bytes without JSON framing,
+        # for clients that want to parse the comma separated data
+        # themselves or save it to disk.
+        if args.format == 'raw':
+            return send_file(data_file_path, mimetype='application/octet-stream')
+
+        # Uploads carry a pre-serialized JSON body written at PUT time;
+        # send_file serves it with zero-copy sendfile where available.
+        # Files from before that change fall back to streaming.
+        json_path = data_file_path + '.json'
+        if os.path.exists(json_path):
+            return send_file(json_path, mimetype='application/json')
+
+        def generate():
+            # A comma separated line of samples is already valid JSON
+            # array content, so frame it and pass the bytes through
+            # without parsing. Files from before the first-line
+            # normalization may hold several lines; the baseline served
+            # only the first, so stop at the first newline.
+            yield b'{"response":['
+            with open(data_file_path, 'rb') as data_file:
+                for chunk in iter(lambda: data_file.read(1 << 16), b''):
+                    newline = chunk.find(b'\n')
+                    if newline != -1:
+                        yield chunk[:newline].rstrip(b'\r')
+                        break
+                    yield chunk
+            yield b']}'
+
+        return webapp.response_class(generate(), mimetype='application/json')
 
     def put(self):
         """ Upload an ECG datafile to the server.
@@ -565,35 +885,105 @@ class ECGDataAPI(Resource):
             }
         """
 
-        args = self.put_parser.parse_args(strict=True)
-        ecgfile = args.data
-
-        # Save the file on disk using a uuid
-        filename = "%s%s.dat" % (self.file_prefix, uuid())
-        ecgfile.save(os.path.join(current_app.config['UPLOAD_FOLDER'], filename))
+        ecgfile = request.files.get('data')
+        if ecgfile is None:
+            abort(400)
+
+        # Stream the upload to disk in 1 MiB chunks, hashing it on the
+        # way through so identical re-uploads can be detected without a
+        # second read of the file.
+        filename = "%s%s.dat" % (self.file_prefix, token_hex(16))
+        data_path = os.path.join(current_app.config['UPLOAD_FOLDER'], filename)
+        digest = hashlib.blake2b(digest_size=32)
+
+        with open(data_path, 'wb') as out_file:
+            while True:
+                chunk = ecgfile.stream.read(1 << 20)
+                if not chunk:
+                    break
+                digest.update(chunk)
+                out_file.write(chunk)
+        content_hash = digest.hexdigest()
+
+        # The baseline format is one comma separated line of samples
+        # and readers only ever served the first line, so normalize to
+        # that and reject content that would not frame into valid JSON.
+        with open(data_path, 'rb') as data_file:
+            samples = data_file.read().split(b'\n', 1)[0].rstrip(b'\r')
+        try:
+            orjson.loads(b'[' + samples + b']')
+        except orjson.JSONDecodeError:
+            os.remove(data_path)
+            abort(400)
 
         # Create a new database record for this file
         with open_session() as session:
-            ecgdata = ECGData(filename)
+            # Identical content reuses the existing record. first()
+            # rather than one(): races before the unique index existed
+            # could leave duplicate hashes, and any match will do.
+            existing = session.execute(
+                select(ECGData).where(ECGData.hash == content_hash).limit(1)
+            ).scalars().first()
+            if existing is not None:
+                os.remove(data_path)
+                return gen_response({"id": existing.id})
+
+            # The data never changes after upload, so serialize the JSON
+            # response body once now instead of on every read.
+            with open(data_path + '.json', 'wb') as json_file:
+                json_file.write(b'{"response":[' + samples + b']}')
+
+            ecgdata = ECGData(filename, content_hash)
             session.add(ecgdata)
             session.flush()
-            session.commit()
 
-            print(ecgdata.id)
+            logger.debug("ECGData record created: %s", ecgdata.id)
 
             return gen_response({"id": ecgdata.id})
 
-    @staticmethod
-    def add(api):
-        api.add_resource(ECGDataAPI, '/ecgdata')
     
 
+# API resources and the routes they serve, registered once at import.
+# An explicit table keeps registration deterministic instead of walking
+# Resource.__subclasses__().
+RESOURCES = (
+    (PatientAPI, '/patient/<int:patient_id>'),
+    (PatientListAPI, '/patients'),
+    (BiometricTypeAPI, '/biometric_types'),
+    (BiometricAPI, '/biometric/<int:biometric_id>'),
+    (BiometricListAPI, '/biometrics'),
+    (ECGAPI, '/ecg'),
+    (ECGDataAPI, '/ecgdata'),
+)
+
+
+def enable_query_diagnostics(app):
+    """Attach the optional nplusone lazy-load detector.
+
+    Called by the CLI for debug runs so accidental per-row lazy loads
+    show up during development instead of as production slowdowns. The
+    dependency is optional and production runs never import it.
+    """
+    try:
+        from nplusone.ext.flask_sqlalchemy import NPlusOne
+    except ImportError:
+        logger.debug("nplusone not installed; lazy-load detection disabled")
+        return
+
+    app.config.setdefault('NPLUSONE_RAISE', False)
+    NPlusOne(app)
+
+
 # Load the api
 def load_api(app):
     api = Api(app)
-    for resource in Resource.__subclasses__():
-        resource.add(api)
+    for resource, route in RESOURCES:
+        api.add_resource(resource, route)
 
 
 # Load the API
 load_api(webapp)
+
+# Compile the URL matcher at import so the first live request does not
+# pay the one-off build cost.
+webapp.url_map.update()
@@ -0,0 +1,154 @@
+"""
+Command line interface for the hrsdb service
+
+Options:
+    -H/--host   Address to bind the server to (127.0.0.1)
+    -p/--port   The port to list on.
+    -d/--debug  If set the server will be ran in debug mode with full logging
+"""
+import logging
+import sys
+
+# Log handler
+logs = logging.getLogger(__name__)
+
+# Defaults
+DEFAULT_HTTP_HOST = '127.0.0.1'
+DEFAULT_HTTP_PORT = 8080
+
+DEFAULT_CONFIG_PATH = '/etc/hrsdb.conf'
+DEFAULT_UPLOAD_FOLDER = '/tmp/hrsdb_uploads'
+
+USAGE = """usage: hrsdb [-h] [-b BIND] [-p PORT] [-c CONFIG] [-d]
+
+options:
+  -h, --help    Show this help message and exit
+  -b, --bind    Address to bind to
+  -p, --port    HTTP server port
+  -c, --config  Config file to load
+  -d, --debug   Run the server in debug mode"""
+
+
+class Args(object):
+    """Parsed command line options.
+
+    argparse pulls in gettext/textwrap on import which is a measurable
+    chunk of service startup, so the small fixed option set is parsed
+    by hand instead.
+    """
+    bind = None
+    port = None
+    config = None
+    debug = False
+
+
+def parse_args(argv):
+    """Parse the command line options into an Args object"""
+    args = Args()
+    pos = 0
+    while pos < len(argv):
+        opt = argv[pos]
+        if opt in ('-h', '--help'):
+            print(USAGE)
+            raise SystemExit(0)
+        elif opt in ('-d', '--debug'):
+            args.debug = True
+        elif opt in ('-b', '--bind', '-p', '--port', '-c', '--config'):
+            pos += 1
+            if pos >= len(argv):
+                raise SystemExit("hrsdb: option %s requires a value\n%s" % (opt, USAGE))
+            value = argv[pos]
+
+            if opt in ('-b', '--bind'):
+                args.bind = value
+            elif opt in ('-c', '--config'):
+                args.config = value
+            else:
+                try:
+                    args.port = int(value)
+                except ValueError:
+                    raise SystemExit("hrsdb: invalid port: %s" % value)
+        else:
+            raise SystemExit("hrsdb: unknown option: %s\n%s" % (opt, USAGE))
+        pos += 1
+
+    return args
+
+
+def main():
+    """Service entry point"""
+    args = parse_args(sys.argv[1:])
+
+    # Heavy imports are deferred until after argument parsing so that
+    # --help and argument errors exit without paying the Flask/SQLAlchemy
+    # import cost.
+    from configparser import Error as ConfigError
+
+    from hrsdb.app import webapp
+    from hrsdb.config import SiteConfig
+    from hrsdb.db import init_db
+    from hrsdb.log import init_log
+
+    # Setup logging
+    init_log()
+
+    # Setup database handler
+    init_db()
+
+    # Setup config
+    if args.config:
+        config_file = args.config
+    else:
+        config_file = DEFAULT_CONFIG_PATH
+    
+    try:
+        config = SiteConfig.from_file(config_file)
+    except ConfigError as error:
+        logs.error("Exception when loading config file: %s", str(error))
+        return
+
+    # Check config order (cli > config > defaults)
+    if args.bind:
+        host = args.bind
+    else:
+        host = config.get('flask', 'bind', fallback=DEFAULT_HTTP_HOST)
+
+    if args.port:
+        port = args.port
+    else:
+        port = config.getint('flask', 'port', fallback=DEFAULT_HTTP_PORT)
+
+    if args.debug:
+        webapp.debug = True
+    else:
+        webapp.debug = config.getboolean('flask', 'debug', fallback=False)
+
+    # Debug runs get the optional N+1 query detector
+    if webapp.debug:
+        from hrsdb.app import enable_query_diagnostics
+        enable_query_diagnostics(webapp)
+
+    webapp.config['UPLOAD_FOLDER'] = config.get('flask', 'upload_folder', fallback=DEFAULT_UPLOAD_FOLDER)
+
+    # Skip pretty-printing and key sorting on every response
+    webapp.config.update(
+        JSONIFY_PRETTYPRINT_REGULAR=False,
+        JSON_SORT_KEYS=False,
+        PROPAGATE_EXCEPTIONS=True
+    )
+
+    # The handlers are I/O-bound on database round-trips and disk reads,
+    # so serve requests concurrently: waitress runs a thread pool and the
+    # dev-server paths enable Werkzeug's per-request threads.
+    if webapp.debug:
+        webapp.run(host=host, port=port, threaded=True)
+        return
+
+    # Serve through a production WSGI server when not debugging
+    try:
+        from waitress import serve
+    except ImportError:
+        logs.warning("waitress not installed, falling back to the Flask dev server")
+        webapp.run(host=host, port=port, threaded=True)
+    else:
+        serve(webapp, host=host, port=port, threads=8)
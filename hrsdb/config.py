@@ -2,6 +2,9 @@
 Config reader 
 """
 
+import functools
+import os
+
 from configparser import ConfigParser, NoSectionError, ParsingError
 
 # Defaults
@@ -16,6 +19,19 @@ class SiteConfig(ConfigParser):
 
     @classmethod
     def from_file(cls, filename):
+        """Load a config file, reusing the parsed result until the
+        file changes on disk.
+        """
+        try:
+            mtime_ns = os.stat(filename).st_mtime_ns
+        except OSError:
+            raise ParsingError("Failed to parse file: %s" % filename)
+
+        return cls._load(filename, mtime_ns)
+
+    @classmethod
+    @functools.lru_cache(maxsize=None)
+    def _load(cls, filename, mtime_ns):
         conf = SiteConfig()
         if not conf.read([filename]):
             raise ParsingError("Failed to parse file: %s" % filename)
@@ -3,11 +3,12 @@ General database settings
 """
 import contextlib
 import logging
+import operator
+import os
+import threading
 
-from sqlalchemy import create_engine, event, DateTime
-from sqlalchemy.orm import sessionmaker
-
-from hrsdb import utils
+from sqlalchemy import create_engine, event, inspect, text
+from sqlalchemy.orm import scoped_session, sessionmaker
 
 # Logging
 logger = logging.getLogger(__name__)
@@ -18,6 +19,7 @@ DEFAULT_URL = 'sqlite:///hrsdb.db'
 # Global database objects
 engine = None
 Session = None
+ReadSession = None
 
 
 def init_db(config=None):
@@ -26,33 +28,113 @@ def init_db(config=None):
     :param db_url: Database URL to use. If None the config is loaded
     """
 
-    global engine, Session
+    global engine, Session, ReadSession
 
     if config is None:
         db_url = DEFAULT_URL
     else:
         db_url = config.get('database', 'url', fallback=DEFAULT_URL)
 
-    logger.info("Database URL: %s" % db_url)
+    logger.info("Database URL: %s", db_url)
 
     # Cleanup if called multiple times
+    if ReadSession is not None:
+        ReadSession.remove()
     if Session is not None:
-        Session.close_all()
+        Session.remove()
     if engine is not None:
         engine.dispose()
 
-    engine = create_engine(db_url)
-    Session = sessionmaker(bind=engine)
+    if db_url.startswith('sqlite'):
+        engine = create_engine(db_url, connect_args={"check_same_thread": False})
+
+        # Tune each new SQLite connection: WAL lets readers proceed
+        # alongside a writer, synchronous=NORMAL drops the per-commit
+        # fsync, and the cache/mmap settings cut read syscalls on the
+        # list endpoints. foreign_keys is off by default in SQLite and
+        # the PUT handlers rely on FK errors for validation.
+        @event.listens_for(engine, "connect")
+        def _set_sqlite_pragma(dbapi_conn, connection_record):
+            cursor = dbapi_conn.cursor()
+            cursor.execute("PRAGMA journal_mode=WAL")
+            cursor.execute("PRAGMA synchronous=NORMAL")
+            cursor.execute("PRAGMA temp_store=MEMORY")
+            cursor.execute("PRAGMA cache_size=-20000")
+            cursor.execute("PRAGMA mmap_size=268435456")
+            cursor.execute("PRAGMA foreign_keys=ON")
+            cursor.close()
+    else:
+        # Networked databases pay a connection setup cost per checkout;
+        # size the pool for the threaded server and recycle/ping so
+        # stale connections never reach a handler.
+        engine = create_engine(
+            db_url,
+            pool_size=20,
+            max_overflow=40,
+            pool_recycle=1800,
+            pool_pre_ping=True,
+        )
+
+    # Sessions are scoped per thread so concurrent requests never share
+    # one session or serialize behind a single connection. The HTTP app
+    # clears the registries in a teardown hook.
+    # expire_on_commit is disabled so ids read back after the context
+    # manager commits do not trigger a refresh SELECT.
+    Session = scoped_session(sessionmaker(bind=engine, expire_on_commit=False))
+
+    # Read-only sessions run on an AUTOCOMMIT view of the same engine so
+    # pure SELECT handlers skip the BEGIN/COMMIT round-trips. The scoped
+    # registry keeps one warm session per thread.
+    ReadSession = scoped_session(
+        sessionmaker(bind=engine.execution_options(isolation_level="AUTOCOMMIT"))
+    )
+
+    # Opt-in query counter for catching N+1 regressions: set
+    # HRSDB_QUERY_COUNT to a per-request budget and the HTTP layer warns
+    # when a request exceeds it.
+    if os.environ.get('HRSDB_QUERY_COUNT'):
+        @event.listens_for(engine, "before_cursor_execute")
+        def _count_query(conn, cursor, statement, parameters, context, executemany):
+            _query_counter.value = query_count() + 1
 
     # Create all database tables
     from hrsdb.db.models import Base, BiometricType
     Base.metadata.create_all(engine)
 
+    # create_all skips tables that already exist, so databases created
+    # before the upload dedup change lack the ecg_data.hash column; add
+    # it in place so ECG uploads keep working on old deployments.
+    columns = {column['name'] for column in inspect(engine).get_columns('ecg_data')}
+    if 'hash' not in columns:
+        logger.info("Adding missing ecg_data.hash column")
+        with engine.begin() as connection:
+            connection.execute(text("ALTER TABLE ecg_data ADD COLUMN hash VARCHAR"))
+
+    # create_all also skips indexes belonging to pre-existing tables;
+    # create any that are missing so old databases pick them up too.
+    for table in Base.metadata.tables.values():
+        for index in table.indexes:
+            index.create(engine, checkfirst=True)
+
     # Build static entries
     with open_session() as session:
         BiometricType.create_static(session)
 
 
+# Per-thread statement counter used by the HRSDB_QUERY_COUNT listener
+_query_counter = threading.local()
+
+
+def reset_query_count():
+    """Zero the current thread's statement counter"""
+    _query_counter.value = 0
+
+
+def query_count():
+    """Return the number of statements issued on this thread since reset"""
+    return getattr(_query_counter, 'value', 0)
+
+
 @contextlib.contextmanager
 def open_session():
     """
@@ -60,34 +142,61 @@ def open_session():
     """
     global engine, Session
 
-    logger.debug("DBHandler opened")
+    logger.debug("Session opened")
     session = Session()
     try:
         yield session
         session.commit()
     except Exception as error:
         session.rollback()
-        logger.exception("Exception: %s" % str(error))
+        logger.exception("Exception: %s", error)
         raise
     finally:
         session.close()
 
 
+@contextlib.contextmanager
+def open_readonly_session():
+    """
+    Handles read-only connections to the database
+    """
+    logger.debug("Read-only session opened")
+    session = ReadSession()
+    try:
+        yield session
+    except Exception as error:
+        logger.exception("Exception: %s", error)
+        raise
+    finally:
+        session.close()
+
+
+# Per-model (column name, attribute getter) pairs for to_dict, computed
+# once per model class so the hot path never walks __table__.columns
+_model_fields = {}
+
+
+def _fields(cls):
+    """Return the cached (name, getter) tuple for a model class"""
+    try:
+        return _model_fields[cls]
+    except KeyError:
+        fields = tuple(
+            (column.name, operator.attrgetter(column.name))
+            for column in cls.__table__.columns
+        )
+        _model_fields[cls] = fields
+        return fields
+
+
 def to_dict(record):
     """
     Converts a database record into a dictionary
     :param record:  Database record
     :return:        Dictionary key=column value=value
-    """
-    rdict = {}
-    for column in record.__table__.columns:
-        value = getattr(record, column.name)
-
-        # Convert datetime string
-        if type(column.type) is DateTime:
-            value = utils.date2str(value)
 
-        rdict[column.name] = value
-            
-    return rdict
+    Datetime columns are left as datetime objects; the orjson encoder in
+    the HTTP layer serializes them to ISO-8601 natively.
+    """
+    return {name: getter(record) for name, getter in _fields(type(record))}
 
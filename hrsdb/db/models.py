@@ -1,12 +1,9 @@
 """
 Database implementation
 """
-import pickle
-
-from sqlalchemy import BLOB, Column, DateTime, Float, ForeignKey, Integer, String
+from sqlalchemy import Column, DateTime, Float, ForeignKey, Index, Integer, String
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
-from sqlalchemy.orm.exc import NoResultFound
 
 Base = declarative_base()
 
@@ -31,6 +28,11 @@ class Patient(Base):
     gender = Column(Integer)
     date_of_birth = Column(DateTime)
 
+    # Readings are fetched through the list endpoints' own filtered
+    # queries; lazy="raise" stops anyone loading a patient's full
+    # history as a side effect of attribute access.
+    biometrics = relationship("Biometric", back_populates="patient", lazy="raise")
+
     def __init__(self, first_name, last_name, gender, date_of_birth):
         self.first_name = first_name
         self.last_name = last_name
@@ -38,13 +40,9 @@ class Patient(Base):
         self.date_of_birth = date_of_birth
 
     def __repr__(self):
-        return "<Patient[%d]: %s %s %s %s>" % (
-            self.id,
-            self.first_name,
-            self.last_name,
-            'F' if self.gender else 'M',
-            str(self.date_of_birth)
-        )
+        dob = self.date_of_birth.isoformat() if self.date_of_birth else None
+        return (f"<Patient[{self.id}]: {self.first_name} {self.last_name} "
+                f"{'F' if self.gender else 'M'} {dob}>")
 
     def add_biometric(self, session, type_id, value, timestamp):
         """Add a new biometric for this patient
@@ -54,15 +52,11 @@ class Patient(Base):
         :param str value:           Biometric raw value
         :param datetime timestamp:  Timestamp of when the biometric was recorded
         """
-        try:
-            session.query(BiometricType)\
-                .filter(BiometricType.id == type_id).one_or_none()
-        except NoResultFound:
+        if type_id not in BiometricType.valid_ids:
             return None
 
         biometric = Biometric(self.id, type_id, value, timestamp)
         session.add(biometric)
-        session.flush()
 
         return biometric
 
@@ -74,9 +68,8 @@ class Patient(Base):
         :param datetime timestamp:  Timestamp of when the biometric was recorded
         :param data:                ECGData object
         """
-        ecg = ECG(self.id, sampling_freq, timestamp, data)
+        ecg = ECG(self.id, sampling_freq, data.id, timestamp)
         session.add(ecg)
-        session.flush()
 
         return ecg
         
@@ -97,6 +90,10 @@ class BiometricType(Base):
         (10, "ecg", "mV")
     ]
 
+    # Known type ids, cached by create_static at startup so validity
+    # checks are a set lookup instead of a SELECT per insert
+    valid_ids = frozenset()
+
     __tablename__ = "biometric_types"
 
     id   = Column(Integer, primary_key=True)
@@ -109,7 +106,7 @@ class BiometricType(Base):
         self.units = units
 
     def __repr__(self):
-        return "<BiometricType: %s %s>" % (self.name, self.units)
+        return f"<BiometricType: {self.name} {self.units}>"
 
     @staticmethod
     def create_static(session):
@@ -118,17 +115,29 @@ class BiometricType(Base):
         :param session: Open database session
         """
 
-        local_data = session.query(BiometricType).all()
-        for id, name, units in BiometricType.static_data:
-            present = False
-            for entry in local_data:
-                if entry.name == name:
-                    present = True
-                    break
+        local_data = session.query(BiometricType.id, BiometricType.name).all()
+        existing = {name for (id, name) in local_data}
+
+        # Add missing entries in one batch
+        session.bulk_save_objects([
+            BiometricType(id, name, units)
+            for id, name, units in BiometricType.static_data
+            if name not in existing
+        ])
 
-            # Add missing entries
-            if not present:
-                session.add(BiometricType(id, name, units))
+        BiometricType.valid_ids = frozenset(
+            id for (id, name) in local_data
+        ) | frozenset(id for id, name, units in BiometricType.static_data)
+
+    @classmethod
+    def refresh_cache(cls, session):
+        """Reload the cached valid_ids set from the database
+
+        :param session: Open database session
+        """
+        cls.valid_ids = frozenset(
+            id for (id,) in session.query(cls.id).all()
+        )
 
 
 class Biometric(Base):
@@ -144,25 +153,46 @@ class Biometric(Base):
     """
     __tablename__ = "biometrics"
 
+    # List queries filter on patient and optionally type (pagination
+    # itself is keyset on id); the compound index turns both filters
+    # into range scans and serves time-range queries per patient.
+    __table_args__ = (
+        Index('ix_biometrics_patient_type_ts', 'patient_id', 'type_id', 'timestamp'),
+    )
+
     id         = Column(Integer, primary_key=True)
     patient_id = Column(ForeignKey("patients.id"))
     type_id    = Column(ForeignKey("biometric_types.id"))
     value      = Column(String)
     timestamp  = Column(DateTime)
 
+    # Endpoints that need type details join explicitly; lazy="raise"
+    # turns any accidental per-row lazy load into an immediate error
+    # instead of a silent N+1 query pattern.
+    type = relationship("BiometricType", lazy="raise")
+    patient = relationship("Patient", back_populates="biometrics", lazy="raise")
+
     def __init__(self, patient_id, type_id, value, timestamp):
         self.patient_id = patient_id
         self.type_id = type_id
         self.value = value
         self.timestamp = timestamp
 
+    @classmethod
+    def bulk_insert(cls, session, mappings):
+        """Insert a batch of biometric readings
+
+        :param session:  Open database session
+        :param mappings: List of column dicts, one per reading
+
+        Bypasses per-instance unit-of-work bookkeeping, which dominates
+        batched ingestion cost.
+        """
+        session.bulk_insert_mappings(cls, mappings)
+
     def __repr__(self):
-        return "<Biometric[%d]: P:%d T:%d V:%s>" % (
-            self.id,
-            self.patient_id,
-            self.type_id,
-            self.value
-        )
+        return (f"<Biometric[{self.id}]: P:{self.patient_id} "
+                f"T:{self.type_id} V:{self.value}>")
 
 
 class ECG(Base):
@@ -179,27 +209,30 @@ class ECG(Base):
     """
     __tablename__ = "ecg"
 
+    __table_args__ = (
+        Index('ix_ecg_patient_ts', 'patient_id', 'timestamp'),
+    )
+
     id            = Column(Integer, primary_key=True)
     patient_id    = Column(ForeignKey("patients.id"))
     sampling_freq = Column(Float)
     data_id       = Column(ForeignKey("ecg_data.id"))
     timestamp     = Column(DateTime)
 
-    data = relationship("ECGData", back_populates="info")
+    # Metadata queries must never drag waveform records along; handlers
+    # that want the data row look it up by data_id explicitly.
+    data = relationship("ECGData", back_populates="info", lazy="raise")
 
-    def __init__(self, patient_id, sampling_freq, data, timestamp):
+    def __init__(self, patient_id, sampling_freq, data_id, timestamp):
         self.patient_id = patient_id
         self.sampling_freq = sampling_freq
+        self.data_id = data_id
         self.timestamp = timestamp
-        self.data_id = data.id
 
     def __repr__(self):
-        return "<ECG[%d]: P:%d F: %f T: %s>" % (
-            self.id,
-            self.patient_id,
-            self.sampling_freq,
-            self.timestamp
-        )
+        ts = self.timestamp.isoformat() if self.timestamp else None
+        return (f"<ECG[{self.id}]: P:{self.patient_id} "
+                f"F: {self.sampling_freq} T: {ts}>")
 
 class ECGData(Base):
     """ ECG Data records table
@@ -208,19 +241,19 @@ class ECGData(Base):
 
     :param int id:      Unique identifier
     :param str path:    Full path to the data file on disk
+    :param str hash:    Content hash of the data file for deduplication
     """
     __tablename__ = "ecg_data"
 
     id   = Column(Integer, primary_key=True)
     path = Column(String)
+    hash = Column(String, unique=True, index=True)
 
     info = relationship("ECG", uselist=False, back_populates="data")
 
-    def __init__(self, path):
+    def __init__(self, path, hash=None):
         self.path = path
+        self.hash = hash
 
     def __repr__(self):
-        return "<ECG[%d]: %s>" % (
-            self.id,
-            self.path
-        )
+        return f"<ECG[{self.id}]: {self.path}>"
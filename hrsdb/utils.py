@@ -2,6 +2,17 @@
 Common utilities for the hrsdb package
 """
 import datetime
+import logging
+
+# Optional C parser for ISO-8601 input. The common slash format still
+# goes through strptime below.
+try:
+    import ciso8601
+except ImportError:
+    ciso8601 = None
+
+# Logging
+logger = logging.getLogger(__name__)
 
 # Datetime format used for conversion
 DATETIME_FORMAT = "%Y/%m/%d %H:%M:%S"
@@ -12,10 +23,23 @@ def str2date(date_string):
     :returns: Date string as a Datetime object, or None if there
                 was conversion errors
     """
+    # datetime.fromisoformat is implemented in C and covers the
+    # ISO-8601 case without any extra dependency
+    try:
+        return datetime.datetime.fromisoformat(date_string)
+    except (TypeError, ValueError):
+        pass
+
+    if ciso8601 is not None:
+        try:
+            return ciso8601.parse_datetime(date_string)
+        except ValueError:
+            pass
+
     try:
         return datetime.datetime.strptime(date_string, DATETIME_FORMAT)
     except Exception as error:
-        print(error)
+        logger.debug("Failed to parse date %r: %s", date_string, error)
         return None
 
 def date2str(date):
@@ -26,5 +50,5 @@ def date2str(date):
     try:
         return date.strftime(DATETIME_FORMAT)
     except Exception as error:
-        print(error)
+        logger.debug("Failed to format date %r: %s", date, error)
         return None
@@ -0,0 +1,37 @@
+"""
+WSGI entry point for the hrsdb service
+
+Exposes the configured application for external WSGI servers, e.g.:
+
+    gunicorn --preload --workers 4 --worker-class gthread --threads 4 \
+        hrsdb.wsgi:application
+
+With --preload the app module, database engine and route map are built
+once in the master process and shared with forked workers.
+
+The config file path can be overridden with the HRSDB_CONFIG environment
+variable; it defaults to the path the CLI uses.
+"""
+import os
+from configparser import Error as ConfigError
+
+from hrsdb.app import webapp as application
+from hrsdb.cli import DEFAULT_CONFIG_PATH, DEFAULT_UPLOAD_FOLDER
+from hrsdb.config import SiteConfig
+from hrsdb.db import init_db
+from hrsdb.log import init_log
+
+init_log()
+init_db()
+
+try:
+    config = SiteConfig.from_file(os.environ.get('HRSDB_CONFIG', DEFAULT_CONFIG_PATH))
+    upload_folder = config.get('flask', 'upload_folder', fallback=DEFAULT_UPLOAD_FOLDER)
+except (ConfigError, OSError):
+    upload_folder = DEFAULT_UPLOAD_FOLDER
+
+application.config['UPLOAD_FOLDER'] = upload_folder
+application.config.update(
+    JSONIFY_PRETTYPRINT_REGULAR=False,
+    JSON_SORT_KEYS=False,
+)